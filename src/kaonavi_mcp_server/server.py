@@ -1,35 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from collections.abc import Callable, Coroutine, Hashable
+from dataclasses import dataclass, field
 from enum import Enum
-import json
+import functools
 from pathlib import Path
-from typing import Any, Dict, Optional
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Final, Optional, TypeVar
+import orjson
 from mcp import stdio_server
 from mcp.server import Server
 from mcp.types import (
     TextContent,
     Tool,
 )
-from pydantic import BaseModel, Field
-from kaonavi_api_executor.auth.access_token import AccessToken
-from kaonavi_api_executor.api_executor import ApiExecutor
-from kaonavi_api_executor.api.get_members_api import GetMembersApi
-from kaonavi_api_executor.api.get_sheets_api import GetSheetsApi
-from kaonavi_api_executor.http_client.http_methods import Post
-from kaonavi_api_executor.transformers.members_member_data_flattener import (
-    MembersMemberDataFlattener,
-)
-from kaonavi_api_executor.transformers.sheets_member_data_flattener import (
-    SheetsMemberDataFlattener,
-)
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+# pandas and kaonavi_api_executor are imported where they are first needed,
+# keeping them out of server start-up
+if TYPE_CHECKING:
+    import pandas as pd
+    from kaonavi_api_executor.auth.access_token import AccessToken
+    from kaonavi_api_executor.api_executor import ApiExecutor
+
+
+# API clients are created on first use and shared for the process lifetime
+@functools.cache
+def _get_access_token() -> AccessToken:
+    from kaonavi_api_executor.auth.access_token import AccessToken
+    from kaonavi_api_executor.http_client.http_methods import Post
+
+    return AccessToken(http_method=Post())
+
+
+@functools.cache
+def _get_members_executor() -> ApiExecutor:
+    from kaonavi_api_executor.api_executor import ApiExecutor
+    from kaonavi_api_executor.api.get_members_api import GetMembersApi
+
+    return ApiExecutor(access_token=_get_access_token(), api=GetMembersApi())
+
+
+# Per-sheet executors are kept for this many recently used sheet_ids
+SHEETS_EXECUTOR_CACHE_SIZE = 32
+
+
+@functools.lru_cache(maxsize=SHEETS_EXECUTOR_CACHE_SIZE)
+def _get_sheets_executor(sheet_id: int) -> ApiExecutor:
+    from kaonavi_api_executor.api_executor import ApiExecutor
+    from kaonavi_api_executor.api.get_sheets_api import GetSheetsApi
+
+    # One API instance per sheet, so concurrent calls for different sheets
+    # never race on a shared set_sheet_id()
+    api = GetSheetsApi()
+    api.set_sheet_id(sheet_id)
+    return ApiExecutor(access_token=_get_access_token(), api=api)
 
 
-# Initialize the API executor with the access token and API model
-access_token = AccessToken(http_method=Post())
-members_api_executor = ApiExecutor(access_token=access_token, api=GetMembersApi())
-get_sheets_api = GetSheetsApi()
-sheets_api_executor = ApiExecutor(access_token=access_token, api=get_sheets_api)
+# Flattened DataFrames are reused for this long before re-flattening
+FLAT_CACHE_TTL_SECONDS = 300
+# Number of leading non-null values per column scanned for sample_values
+SAMPLE_SCAN_ROWS = 256
+# Boolean masks of this many recent queries are kept per cached DataFrame
+QUERY_CACHE_SIZE = 128
+# Serialized responses of this many recent requests are kept per DataFrame
+RESPONSE_CACHE_SIZE = 16
+# Frames with more rows than this are filtered/serialized in a worker thread
+OFFLOAD_ROWS = 1000
+
+
+@dataclass
+class FlatData:
+    df: pd.DataFrame
+    # Serialized describe_* output, built together with the DataFrame
+    info_json: str
+    # Masks live and expire with the DataFrame they were computed against
+    masks: OrderedDict[str, pd.Series[bool]] = field(default_factory=OrderedDict)
+    # Serialized unfiltered records, built on first use
+    records_json: str | None = None
+    # Filtered/projected responses keyed by (query, columns)
+    responses: OrderedDict[Hashable, str] = field(default_factory=OrderedDict)
+    # Guards masks, which worker threads update while filtering
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # Responses being rendered, so identical concurrent queries share one
+    pending: dict[Hashable, asyncio.Task[str]] = field(default_factory=dict)
+
+
+class InvalidArgumentError(ValueError):
+    pass
+
+
+class FlatCache:
+    def __init__(self, ttl: float) -> None:
+        self._ttl = ttl
+        self._entries: dict[Hashable, tuple[float, FlatData]] = {}
+        # Bumped by invalidate(), so a fetch that started before a forced
+        # refresh cannot overwrite the refreshed data by finishing last
+        self._generations: dict[Hashable, int] = {}
+
+    def get(self, key: Hashable) -> FlatData | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, data = entry
+        if time.monotonic() - stored_at > self._ttl:
+            del self._entries[key]
+            return None
+        return data
+
+    def generation(self, key: Hashable) -> int:
+        return self._generations.get(key, 0)
+
+    def set(self, key: Hashable, data: FlatData, generation: int) -> None:
+        if generation != self.generation(key):
+            return
+        now = time.monotonic()
+        # Drop expired entries too, so sheets that are never read again
+        # do not keep their DataFrames alive
+        expired = [
+            k
+            for k, (stored_at, _) in self._entries.items()
+            if now - stored_at > self._ttl
+        ]
+        for k in expired:
+            del self._entries[k]
+        self._entries[key] = (now, data)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        self._generations[key] = self.generation(key) + 1
+
+
+flat_cache = FlatCache(ttl=FLAT_CACHE_TTL_SECONDS)
+# Fetches in progress per cache key, so concurrent misses share one fetch
+_inflight: dict[Hashable, asyncio.Task[FlatData]] = {}
 
 
 class DescribeMemberFields(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     no_cache: bool = Field(
         default=False,
         description="If true, ignores cache and fetches fresh data from Kaonavi API",
@@ -38,6 +151,8 @@ class DescribeMemberFields(BaseModel):
 
 
 class DescribeSheetFields(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     sheet_id: int = Field(
         description="ID of the sheet to retrieve fields from",
         examples=[1, 2, 3],
@@ -50,12 +165,20 @@ class DescribeSheetFields(BaseModel):
 
 
 class GetMembers(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     query: Optional[str] = Field(
         default=None,
         description="pandas query string to filter members. "
         "Example: \"age >= 30 and city == '渋谷'\"",
         examples=["age >= 30 and department == '営業'"],
     )
+    columns: Optional[list[str]] = Field(
+        default=None,
+        description="Columns to include in the result. "
+        "All columns are returned if omitted.",
+        examples=[["社員番号", "氏名"]],
+    )
     no_cache: bool = Field(
         default=False,
         description="If true, ignores cache and fetches fresh data from Kaonavi API",
@@ -64,6 +187,8 @@ class GetMembers(BaseModel):
 
 
 class GetSheets(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     sheet_id: int = Field(
         description="ID of the sheet to retrieve",
         examples=[1, 2, 3],
@@ -74,6 +199,12 @@ class GetSheets(BaseModel):
         "Example: \"age >= 30 and city == '渋谷'\"",
         examples=["age >= 30 and department == '営業'"],
     )
+    columns: Optional[list[str]] = Field(
+        default=None,
+        description="Columns to include in the result. "
+        "All columns are returned if omitted.",
+        examples=[["社員番号", "氏名"]],
+    )
     no_cache: bool = Field(
         default=False,
         description="If true, ignores cache and fetches fresh data from Kaonavi API",
@@ -82,7 +213,134 @@ class GetSheets(BaseModel):
 
 
 class GetSheetIds(BaseModel):
-    pass
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+
+class SheetEntry(BaseModel):
+    # Keep any extra keys users put in sheets_config.json
+    model_config = ConfigDict(extra="allow")
+
+    id: int
+    name: str
+
+
+class SheetsConfig(BaseModel):
+    sheets: list[SheetEntry]
+
+
+def _default(obj: Any) -> Any:
+    import pandas as pd
+
+    # Missing values can still come out as pd.NA (object columns) or pd.NaT
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _dumps(obj: Any) -> str:
+    return orjson.dumps(
+        obj,
+        default=_default,
+        option=orjson.OPT_INDENT_2
+        | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_SERIALIZE_NUMPY,
+    ).decode()
+
+
+def _to_records(df: pd.DataFrame) -> list[dict[Any, Any]]:
+    import pandas as pd
+
+    # Series.tolist() yields native Python scalars in one pass per column,
+    # which is much cheaper than DataFrame.to_dict(orient="records").
+    cols = df.columns.tolist()
+    arrays = [
+        # Extension columns (e.g. Arrow strings) would hand orjson pd.NA for
+        # missing values, each one a round trip through _default
+        df[col].astype(object).where(df[col].notna(), None).tolist()
+        if pd.api.types.is_extension_array_dtype(df[col].dtype)
+        else df[col].tolist()
+        for col in cols
+    ]
+    return [dict(zip(cols, row)) for row in zip(*arrays)]
+
+
+# String literals are dropped before looking for column names in a query
+_QUERY_LITERAL = re.compile(r"'(?:\\.|[^'\\])*'|\"(?:\\.|[^\"\\])*\"")
+_QUERY_NAME = re.compile(r"`([^`]*)`|([^\W\d]\w*)")
+
+
+def _query_engine(df: pd.DataFrame, query: str) -> str:
+    import pandas as pd
+
+    # numexpr cannot evaluate extension arrays (e.g. Arrow strings); pandas
+    # would switch to the python engine itself, but only after warning
+    extension_cols = {
+        col
+        for col, dtype in df.dtypes.items()
+        if pd.api.types.is_extension_array_dtype(dtype)
+    }
+    if extension_cols:
+        for quoted, name in _QUERY_NAME.findall(_QUERY_LITERAL.sub("", query)):
+            if (quoted or name) in extension_cols:
+                return "python"
+    return "numexpr"
+
+
+def _query_mask(df: pd.DataFrame, query: str) -> pd.Series[bool]:
+    import pandas as pd
+
+    # Evaluate into a boolean mask with numexpr where it applies; queries on
+    # extension columns (e.g. "name.str.contains('田中')") use the python engine.
+    # Empty local/global dicts stop pandas from walking the caller's frames
+    # to build the expression scope; only column names need resolving.
+    engine = _query_engine(df, query)
+    try:
+        mask = df.eval(
+            query, engine=engine, parser="pandas", local_dict={}, global_dict={}
+        )
+    except (NotImplementedError, ValueError):
+        if engine == "python":
+            raise
+        # Genuinely invalid queries fail again here with the python engine
+        mask = df.eval(
+            query, engine="python", parser="pandas", local_dict={}, global_dict={}
+        )
+    if not (isinstance(mask, pd.Series) and pd.api.types.is_bool_dtype(mask)):
+        raise ValueError("query must evaluate to a boolean condition")
+    # Comparisons on Arrow-backed strings yield NA for missing values;
+    # treat those rows as non-matching like object columns did.
+    if mask.hasnans:
+        mask = mask.fillna(False)
+    # Nullable/Arrow booleans become a plain numpy mask
+    return mask.astype(bool)
+
+
+def _filter(data: FlatData, query: str) -> pd.DataFrame:
+    with data.lock:
+        mask = data.masks.get(query)
+        if mask is not None:
+            data.masks.move_to_end(query)
+    if mask is None:
+        mask = _query_mask(data.df, query)
+        with data.lock:
+            data.masks[query] = mask
+            if len(data.masks) > QUERY_CACHE_SIZE:
+                data.masks.popitem(last=False)
+    return data.df.loc[mask]
+
+
+def _to_arrow_strings(df: pd.DataFrame) -> pd.DataFrame:
+    import pandas as pd
+
+    string_cols = {
+        col: "string[pyarrow]"
+        for col, series in df.items()
+        if series.dtype == object
+        and pd.api.types.infer_dtype(series, skipna=True) == "string"
+    }
+    return df.astype(string_cols) if string_cols else df
 
 
 class KaonaviTools(str, Enum):
@@ -93,99 +351,431 @@ class KaonaviTools(str, Enum):
     GET_SHEET_IDS = "get_sheet_ids"
 
 
+@functools.cache
+def _schema(model: type[BaseModel]) -> dict[str, Any]:
+    # The memoized dict is shared with every caller; treat it as read-only
+    return model.model_json_schema()
+
+
+# Tool schemas and definitions are static, so build them once at import
+_DESCRIBE_MEMBER_FIELDS_DESCRIPTION: Final[str] = """
+            List available fields in Kaonavi member data.
+
+            This tool returns metadata about each field in the member dataset,
+            including its type and example values. Useful when the user or AI needs
+            to understand what fields can be used in filtering.
+
+            Parameters:
+            - no_cache: (optional) Boolean to bypass cache and fetch fresh data.
+                            ⚠️ Avoid using this unless specifically needed.
+        """
+
+_DESCRIBE_SHEET_FIELDS_DESCRIPTION: Final[str] = """
+            List available fields in a specific sheet of Kaonavi member data.
+
+            This tool returns metadata about each field in the specified sheet,
+            including its type and example values. Useful when the user or AI needs
+            to understand what fields can be used in filtering.
+
+            Parameters:
+            - sheet_id: ID of the sheet to retrieve fields from
+            - no_cache: (optional) Boolean to bypass cache and fetch fresh data.
+                            ⚠️ Avoid using this unless specifically needed.
+        """
+
+_GET_MEMBERS_DESCRIPTION: Final[str] = """
+            Retrieve filtered member list from Kaonavi.
+
+            This tool returns member information, optionally filtered using a pandas-style query.
+            To know which fields are available and what values they might contain, 
+            use `describe_member_fields` beforehand to inspect the structure of the data.
+
+            Parameters:
+            - query: (optional) A pandas-style query string
+            - columns: (optional) List of columns to include in the result
+            - no_cache: (optional) Boolean to bypass cache and fetch fresh data.
+                            ⚠️ Only use this when explicitly instructed, as cached data is usually sufficient.
+
+            Examples for query:
+            - "age >= 30 and department == '営業'"
+            - "city == '渋谷'"
+            - "name.str.contains('田中')"
+        """
+
+_GET_SHEETS_DESCRIPTION: Final[str] = """
+            Retrieve member data from a specific sheet in Kaonavi.
+
+            This tool fetches member information from a specified sheet ID,
+            optionally filtered using a pandas-style query.
+            To know which fields are available and what values they might contain, 
+            use `describe_sheet_fields` beforehand to inspect the structure of the data.
+
+            Note: The filtering key for members in GET_SHEETS is the employee number (社員番号).
+            Employee numbers can be obtained from GET_MEMBERS.
+
+            Parameters:
+            - sheet_id: ID of the sheet to retrieve
+            - query: (optional) A pandas-style query string
+            - columns: (optional) List of columns to include in the result
+            - no_cache: (optional) Boolean to bypass cache and fetch fresh data.
+                            ⚠️ Only use this when explicitly instructed, as cached data is usually sufficient.
+
+            Examples for query:
+            - "age >= 30 and department == '営業'"
+            - "city == '渋谷'"
+            - "name.str.contains('田中')"
+        """
+
+_GET_SHEET_IDS_DESCRIPTION: Final[str] = """
+            Get a list of available sheet IDs and names for use with get_sheets.
+            The list is loaded from sheets_config.json in the project root.
+            If the file is missing or invalid, an error will be returned.
+        """
+
+_TOOLS: Final[list[Tool]] = [
+    Tool(
+        name=KaonaviTools.DESCRIBE_MEMBER_FIELDS,
+        description=_DESCRIBE_MEMBER_FIELDS_DESCRIPTION,
+        inputSchema=_schema(DescribeMemberFields),
+    ),
+    Tool(
+        name=KaonaviTools.DESCRIBE_SHEET_FIELDS,
+        description=_DESCRIBE_SHEET_FIELDS_DESCRIPTION,
+        inputSchema=_schema(DescribeSheetFields),
+    ),
+    Tool(
+        name=KaonaviTools.GET_MEMBERS,
+        description=_GET_MEMBERS_DESCRIPTION,
+        inputSchema=_schema(GetMembers),
+    ),
+    Tool(
+        name="get_sheets",
+        description=_GET_SHEETS_DESCRIPTION,
+        inputSchema=_schema(GetSheets),
+    ),
+    Tool(
+        name=KaonaviTools.GET_SHEET_IDS,
+        description=_GET_SHEET_IDS_DESCRIPTION,
+        inputSchema=_schema(GetSheetIds),
+    ),
+]
+
+
+SHEETS_CONFIG_PATH = Path(__file__).parent.parent.parent / "sheets_config.json"
+
+
 def load_sheets_config() -> Dict[str, Any]:
-    config_path = Path(__file__).parent.parent.parent / "sheets_config.json"
+    config_path = SHEETS_CONFIG_PATH
     if not config_path.exists():
         raise FileNotFoundError(
             "sheets_config.json not found. Please provide the file in the project root."
         )
-    with open(config_path, encoding="utf-8") as f:
-        data = json.load(f)
-    if (
-        not isinstance(data, dict)
-        or "sheets" not in data
-        or not isinstance(data["sheets"], list)
-    ):
+    try:
+        # Parse and validate in a single pydantic-core pass
+        config = SheetsConfig.model_validate_json(config_path.read_bytes())
+    except ValidationError as e:
         raise ValueError(
-            "sheets_config.json is invalid. 'sheets' key with a list value is required."
-        )
-    return data
+            "sheets_config.json is invalid. 'sheets' key with a list of "
+            f"{{id, name}} entries is required.\n{e}"
+        ) from e
+    return config.model_dump()
 
 
-async def describe_member_fields(no_cache: bool = False) -> str:
-    result = await members_api_executor.execute(no_cache=no_cache)
+@functools.cache
+def _sheet_ids_json() -> str:
+    # Exceptions are not cached, so a missing or invalid file is reported
+    # (and re-read) on each get_sheet_ids call until it loads successfully.
+    return _dumps(load_sheets_config()["sheets"])
+
+
+# Load sheets_config.json once at startup; errors surface on first use
+try:
+    _sheet_ids_json()
+except (OSError, ValueError):
+    pass
+
+
+def _col_info(series: pd.Series[Any]) -> dict[str, Any]:
+    # Per-column dropna() first, so sparse columns still find their values
+    values = series.dropna().iloc[:SAMPLE_SCAN_ROWS]
+    try:
+        # Only the (at most 5) returned values are converted to str
+        samples = values.drop_duplicates().head(5).astype(str).tolist()
+    except TypeError:
+        # Unhashable cells (e.g. lists) are de-duplicated by their str form
+        samples = list(dict.fromkeys(values.astype(str).tolist()))[:5]
+    return {"dtype": str(series.dtype), "sample_values": samples}
+
+
+def _describe_fields(df: pd.DataFrame) -> dict[str, dict[str, Any]]:
+    return {str(col): _col_info(series) for col, series in df.items()}
+
+
+def _flatten_members(result: Any) -> FlatData:
+    from kaonavi_api_executor.transformers.members_member_data_flattener import (
+        MembersMemberDataFlattener,
+    )
 
     flattener = MembersMemberDataFlattener(result)
     df, _ = flattener.flatten()
+    df = _to_arrow_strings(df)
+    return FlatData(df=df, info_json=_dumps(_describe_fields(df)))
 
-    info = {
-        col: {
-            "dtype": str(df[col].dtype),
-            "sample_values": df[col].dropna().astype(str).unique().tolist()[:5],
-        }
-        for col in df.columns
-    }
 
-    return json.dumps(info, indent=2, ensure_ascii=False)
+def _flatten_sheets(result: Any) -> FlatData:
+    from kaonavi_api_executor.transformers.sheets_member_data_flattener import (
+        SheetsMemberDataFlattener,
+    )
 
+    flattener = SheetsMemberDataFlattener(result)
+    df = _to_arrow_strings(flattener.flatten())
+    return FlatData(df=df, info_json=_dumps(_describe_fields(df)))
 
-async def describe_sheet_fields(sheet_id: int, no_cache: bool = False) -> str:
-    get_sheets_api.set_sheet_id(sheet_id)
-    result = await sheets_api_executor.execute(no_cache=no_cache)
 
-    flattener = SheetsMemberDataFlattener(result)
-    df = flattener.flatten()
-
-    info = {
-        col: {
-            "dtype": str(df[col].dtype),
-            "sample_values": df[col].dropna().astype(str).unique().tolist()[:5],
-        }
-        for col in df.columns
-    }
+def _records_json(df: pd.DataFrame) -> str:
+    return _dumps(_to_records(df))
 
-    return json.dumps(info, indent=2, ensure_ascii=False)
 
+_T = TypeVar("_T")
 
-async def get_members(query: str | None = None, no_cache: bool = False) -> str:
-    result = await members_api_executor.execute(no_cache=no_cache)
 
-    flattener = MembersMemberDataFlattener(result)
-    df, _ = flattener.flatten()
+async def _single_flight(
+    registry: dict[Hashable, asyncio.Task[_T]],
+    key: Hashable,
+    fetch: Callable[[], Coroutine[Any, Any, _T]],
+    replace: bool = False,
+) -> _T:
+    # No await happens between the lookup and the insert, so the event loop
+    # guarantees that only the first caller starts the fetch. With replace,
+    # a new fetch is started and later callers join it instead.
+    task = registry.get(key)
+    if task is None or replace:
+        task = asyncio.create_task(fetch())
+        registry[key] = task
 
-    if query:
-        try:
-            df = df.query(query)
-        except Exception as e:
-            return json.dumps({"error": f"Invalid query: {e}"}, ensure_ascii=False)
+        def unregister(done: object) -> None:
+            # A replaced task must not unregister the one that replaced it
+            if registry.get(key) is done:
+                del registry[key]
 
-    member_data = df.to_dict(orient="records")
-    return json.dumps(member_data, indent=2, ensure_ascii=False)
+        task.add_done_callback(unregister)
+    # shield() keeps one cancelled caller from cancelling the shared fetch
+    return await asyncio.shield(task)
 
 
-async def get_sheets(
-    sheet_id: int, query: str | None = None, no_cache: bool = False
-) -> str:
-    get_sheets_api.set_sheet_id(sheet_id)
-    result = await sheets_api_executor.execute(no_cache=no_cache)
+async def _get_members_data(no_cache: bool = False) -> FlatData:
+    key = ("members",)
+    if no_cache:
+        flat_cache.invalidate(key)
+    else:
+        cached = flat_cache.get(key)
+        if cached is not None:
+            return cached
+    generation = flat_cache.generation(key)
 
-    flattener = SheetsMemberDataFlattener(result)
-    df = flattener.flatten()
+    async def fetch() -> FlatData:
+        result = await _get_members_executor().execute(no_cache=no_cache)
+
+        # Flattening is CPU-bound pandas work; keep it off the event loop
+        data = await asyncio.to_thread(_flatten_members, result)
+        flat_cache.set(key, data, generation)
+        return data
+
+    # Misses join any fetch in flight, a forced refresh included; a forced
+    # refresh always starts its own, as running fetches may return stale data
+    return await _single_flight(_inflight, key, fetch, replace=no_cache)
 
+
+async def _get_sheets_data(sheet_id: int, no_cache: bool = False) -> FlatData:
+    key = ("sheets", sheet_id)
+    if no_cache:
+        flat_cache.invalidate(key)
+    else:
+        cached = flat_cache.get(key)
+        if cached is not None:
+            return cached
+    generation = flat_cache.generation(key)
+
+    async def fetch() -> FlatData:
+        result = await _get_sheets_executor(sheet_id).execute(no_cache=no_cache)
+
+        data = await asyncio.to_thread(_flatten_sheets, result)
+        flat_cache.set(key, data, generation)
+        return data
+
+    return await _single_flight(_inflight, key, fetch, replace=no_cache)
+
+
+async def describe_member_fields(no_cache: bool = False) -> str:
+    data = await _get_members_data(no_cache=no_cache)
+    return data.info_json
+
+
+async def describe_sheet_fields(sheet_id: int, no_cache: bool = False) -> str:
+    data = await _get_sheets_data(sheet_id, no_cache=no_cache)
+    return data.info_json
+
+
+def _filter_and_dump(
+    data: FlatData, query: str | None, columns: list[str] | None
+) -> str:
+    df = data.df
     if query:
         try:
-            df = df.query(query)
+            df = _filter(data, query)
         except Exception as e:
-            return json.dumps({"error": f"Invalid query: {e}"}, ensure_ascii=False)
+            raise InvalidArgumentError(f"Invalid query: {e}") from e
+    if columns is not None:
+        if not columns:
+            raise InvalidArgumentError("columns must name at least one column")
+        unknown = [col for col in columns if col not in df.columns]
+        if unknown:
+            raise InvalidArgumentError(f"Unknown columns: {unknown}")
+        # Repeated names would otherwise select the same column twice
+        df = df[list(dict.fromkeys(columns))]
+    return _records_json(df)
+
+
+async def _serialize(df: pd.DataFrame) -> str:
+    if len(df) > OFFLOAD_ROWS:
+        return await asyncio.to_thread(_records_json, df)
+    return _records_json(df)
+
+
+async def _records_response(
+    data: FlatData, query: str | None, columns: list[str] | None
+) -> str:
+    key = (
+        query or None,
+        tuple(dict.fromkeys(columns)) if columns is not None else None,
+    )
+    if key == (None, None):
+        # The unfiltered response only changes when the DataFrame does
+        if data.records_json is None:
+
+            async def render_all() -> str:
+                data.records_json = await _serialize(data.df)
+                return data.records_json
+
+            return await _single_flight(data.pending, key, render_all)
+        return data.records_json
+
+    cached = data.responses.get(key)
+    if cached is not None:
+        data.responses.move_to_end(key)
+        return cached
+
+    async def render() -> str:
+        try:
+            if len(data.df) > OFFLOAD_ROWS:
+                # Filtering and serialization are CPU-bound; keep them off the loop
+                text = await asyncio.to_thread(_filter_and_dump, data, query, columns)
+            else:
+                text = _filter_and_dump(data, query, columns)
+        except InvalidArgumentError as e:
+            return _dumps({"error": str(e)})
+
+        data.responses[key] = text
+        if len(data.responses) > RESPONSE_CACHE_SIZE:
+            data.responses.popitem(last=False)
+        return text
+
+    return await _single_flight(data.pending, key, render)
+
+
+async def get_members(
+    query: str | None = None,
+    columns: list[str] | None = None,
+    no_cache: bool = False,
+) -> str:
+    data = await _get_members_data(no_cache=no_cache)
+    return await _records_response(data, query, columns)
 
-    member_data = df.to_dict(orient="records")
-    return json.dumps(member_data, indent=2, ensure_ascii=False)
+
+async def get_sheets(
+    sheet_id: int,
+    query: str | None = None,
+    columns: list[str] | None = None,
+    no_cache: bool = False,
+) -> str:
+    data = await _get_sheets_data(sheet_id, no_cache=no_cache)
+    return await _records_response(data, query, columns)
 
 
 async def get_sheet_ids() -> str:
-    config = load_sheets_config()
-    sheets = config["sheets"]
-    return json.dumps(sheets, ensure_ascii=False, indent=2)
+    return _sheet_ids_json()
+
+
+async def _handle_describe_member_fields(
+    arguments: dict[str, Any],
+) -> list[TextContent]:
+    args = DescribeMemberFields.model_validate(arguments)
+    info = await describe_member_fields(no_cache=args.no_cache)
+    return [
+        TextContent(type="text", text="Available fields:"),
+        TextContent(type="text", text=info),
+    ]
+
+
+async def _handle_describe_sheet_fields(
+    arguments: dict[str, Any],
+) -> list[TextContent]:
+    args = DescribeSheetFields.model_validate(arguments)
+    info = await describe_sheet_fields(sheet_id=args.sheet_id, no_cache=args.no_cache)
+    return [
+        TextContent(type="text", text=f"Available fields in sheet {args.sheet_id}:"),
+        TextContent(type="text", text=info),
+    ]
+
+
+async def _handle_get_members(arguments: dict[str, Any]) -> list[TextContent]:
+    args = GetMembers.model_validate(arguments)
+    members = await get_members(
+        query=args.query, columns=args.columns, no_cache=args.no_cache
+    )
+    return [
+        TextContent(type="text", text="Members information:"),
+        TextContent(type="text", text=members),
+    ]
+
+
+async def _handle_get_sheets(arguments: dict[str, Any]) -> list[TextContent]:
+    args = GetSheets.model_validate(arguments)
+    members = await get_sheets(
+        sheet_id=args.sheet_id,
+        query=args.query,
+        columns=args.columns,
+        no_cache=args.no_cache,
+    )
+    return [
+        TextContent(
+            type="text", text=f"Members information from sheet {args.sheet_id}:"
+        ),
+        TextContent(type="text", text=members),
+    ]
+
+
+async def _handle_get_sheet_ids(arguments: dict[str, Any]) -> list[TextContent]:
+    GetSheetIds.model_validate(arguments)
+    try:
+        sheet_ids = await get_sheet_ids()
+    except Exception as e:
+        return [TextContent(type="text", text=f"[ERROR] {e}")]
+    return [
+        TextContent(type="text", text="Sheet IDs:"),
+        TextContent(type="text", text=sheet_ids),
+    ]
+
+
+_HANDLERS: Final[
+    dict[str, Callable[[dict[str, Any]], Coroutine[Any, Any, list[TextContent]]]]
+] = {
+    KaonaviTools.DESCRIBE_MEMBER_FIELDS.value: _handle_describe_member_fields,
+    KaonaviTools.DESCRIBE_SHEET_FIELDS.value: _handle_describe_sheet_fields,
+    KaonaviTools.GET_MEMBERS.value: _handle_get_members,
+    KaonaviTools.GET_SHEETS.value: _handle_get_sheets,
+    KaonaviTools.GET_SHEET_IDS.value: _handle_get_sheet_ids,
+}
 
 
 async def serve() -> None:
@@ -193,156 +783,14 @@ async def serve() -> None:
 
     @server.list_tools()
     async def list_tools() -> list[Tool]:
-        return [
-            Tool(
-                name=KaonaviTools.DESCRIBE_MEMBER_FIELDS,
-                description="""
-                    List available fields in Kaonavi member data.
-
-                    This tool returns metadata about each field in the member dataset,
-                    including its type and example values. Useful when the user or AI needs
-                    to understand what fields can be used in filtering.
-
-                    Parameters:
-                    - no_cache: (optional) Boolean to bypass cache and fetch fresh data.
-                                    ⚠️ Avoid using this unless specifically needed.
-                """,
-                inputSchema=DescribeMemberFields.model_json_schema(),
-            ),
-            Tool(
-                name=KaonaviTools.DESCRIBE_SHEET_FIELDS,
-                description="""
-                    List available fields in a specific sheet of Kaonavi member data.
-
-                    This tool returns metadata about each field in the specified sheet,
-                    including its type and example values. Useful when the user or AI needs
-                    to understand what fields can be used in filtering.
-
-                    Parameters:
-                    - sheet_id: ID of the sheet to retrieve fields from
-                    - no_cache: (optional) Boolean to bypass cache and fetch fresh data.
-                                    ⚠️ Avoid using this unless specifically needed.
-                """,
-                inputSchema=DescribeSheetFields.model_json_schema(),
-            ),
-            Tool(
-                name=KaonaviTools.GET_MEMBERS,
-                description="""
-                    Retrieve filtered member list from Kaonavi.
-
-                    This tool returns member information, optionally filtered using a pandas-style query.
-                    To know which fields are available and what values they might contain, 
-                    use `describe_member_fields` beforehand to inspect the structure of the data.
-
-                    Parameters:
-                    - query: (optional) A pandas-style query string
-                    - no_cache: (optional) Boolean to bypass cache and fetch fresh data.
-                                    ⚠️ Only use this when explicitly instructed, as cached data is usually sufficient.
-
-                    Examples for query:
-                    - "age >= 30 and department == '営業'"
-                    - "city == '渋谷'"
-                    - "name.str.contains('田中')"
-                """,
-                inputSchema=GetMembers.model_json_schema(),
-            ),
-            Tool(
-                name="get_sheets",
-                description="""
-                    Retrieve member data from a specific sheet in Kaonavi.
-
-                    This tool fetches member information from a specified sheet ID,
-                    optionally filtered using a pandas-style query.
-                    To know which fields are available and what values they might contain, 
-                    use `describe_sheet_fields` beforehand to inspect the structure of the data.
-
-                    Note: The filtering key for members in GET_SHEETS is the employee number (社員番号).
-                    Employee numbers can be obtained from GET_MEMBERS.
-
-                    Parameters:
-                    - sheet_id: ID of the sheet to retrieve
-                    - query: (optional) A pandas-style query string
-                    - no_cache: (optional) Boolean to bypass cache and fetch fresh data.
-                                    ⚠️ Only use this when explicitly instructed, as cached data is usually sufficient.
-
-                    Examples for query:
-                    - "age >= 30 and department == '営業'"
-                    - "city == '渋谷'"
-                    - "name.str.contains('田中')"
-                """,
-                inputSchema=GetSheets.model_json_schema(),
-            ),
-            Tool(
-                name=KaonaviTools.GET_SHEET_IDS,
-                description="""
-                    Get a list of available sheet IDs and names for use with get_sheets.
-                    The list is loaded from sheets_config.json in the project root.
-                    If the file is missing or invalid, an error will be returned.
-                """,
-                inputSchema=GetSheetIds.model_json_schema(),
-            ),
-        ]
+        return _TOOLS
 
     @server.call_tool()
     async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
-        match name:
-            case KaonaviTools.DESCRIBE_MEMBER_FIELDS:
-                info = await describe_member_fields(
-                    no_cache=arguments.get("no_cache", False)
-                )
-                return [TextContent(type="text", text=f"Available fields:\n{info}")]
-
-            case KaonaviTools.DESCRIBE_SHEET_FIELDS:
-                sheet_id = arguments.get("sheet_id")
-                if sheet_id is None:
-                    raise ValueError(
-                        "sheet_id is required for describe_sheet_fields tool."
-                    )
-                info = await describe_sheet_fields(
-                    sheet_id=sheet_id,
-                    no_cache=arguments.get("no_cache", False),
-                )
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"Available fields in sheet {sheet_id}:\n{info}",
-                    )
-                ]
-
-            case KaonaviTools.GET_MEMBERS:
-                members = await get_members(
-                    query=arguments.get("query"),
-                    no_cache=arguments.get("no_cache", False),
-                )
-                return [
-                    TextContent(type="text", text=f"Members information:\n{members}")
-                ]
-
-            case KaonaviTools.GET_SHEETS:
-                sheet_id = arguments.get("sheet_id")
-                if sheet_id is None:
-                    raise ValueError("sheet_id is required for get_sheets tool.")
-                members = await get_sheets(
-                    sheet_id=sheet_id,
-                    query=arguments.get("query"),
-                    no_cache=arguments.get("no_cache", False),
-                )
-                return [
-                    TextContent(
-                        type="text",
-                        text=f"Members information from sheet {sheet_id}:\n{members}",
-                    )
-                ]
-
-            case KaonaviTools.GET_SHEET_IDS:
-                try:
-                    sheet_ids = await get_sheet_ids()
-                except Exception as e:
-                    return [TextContent(type="text", text=f"[ERROR] {e}")]
-                return [TextContent(type="text", text=f"Sheet IDs:\n{sheet_ids}")]
-
-            case _:
-                raise ValueError(f"Unknown tool: {name}")
+        handler = _HANDLERS.get(name)
+        if handler is None:
+            raise ValueError(f"Unknown tool: {name}")
+        return await handler(arguments)
 
     options = server.create_initialization_options()
     async with stdio_server() as (read_stream, write_stream):
@@ -350,8 +798,6 @@ async def serve() -> None:
 
 
 def main() -> None:
-    import asyncio
-
     asyncio.run(serve())
 
 
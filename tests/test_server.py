@@ -0,0 +1,256 @@
+import asyncio
+from collections.abc import Iterator
+from pathlib import Path
+import warnings
+from typing import Any
+
+import orjson
+import pandas as pd
+from pydantic import ValidationError
+import pytest
+
+from kaonavi_mcp_server import server
+
+
+class StubExecutor:
+    def __init__(self) -> None:
+        self.calls: list[bool] = []
+        # Extra seconds a call takes, by its no_cache flag
+        self.delays: dict[bool, float] = {}
+
+    async def execute(self, no_cache: bool = False) -> Any:
+        self.calls.append(no_cache)
+        fetch = len(self.calls)
+        # Yield so concurrent callers get a chance to miss the cache too
+        await asyncio.sleep(self.delays.get(no_cache, 0))
+        return fetch
+
+
+def _flatten(result: Any) -> server.FlatData:
+    df = server._to_arrow_strings(
+        pd.DataFrame(
+            {
+                "社員番号": ["A001", "A002", "A003"],
+                "氏名": ["田中", "佐藤", None],
+                "age": [25, 35, 45],
+                "fetch": [result] * 3,
+            }
+        )
+    )
+    return server.FlatData(df=df, info_json=server._dumps(server._describe_fields(df)))
+
+
+@pytest.fixture
+def executor(monkeypatch: pytest.MonkeyPatch) -> StubExecutor:
+    stub = StubExecutor()
+    monkeypatch.setattr(server, "_get_members_executor", lambda: stub)
+    monkeypatch.setattr(server, "_flatten_members", _flatten)
+    monkeypatch.setattr(
+        server, "flat_cache", server.FlatCache(ttl=server.FLAT_CACHE_TTL_SECONDS)
+    )
+    monkeypatch.setattr(server, "_inflight", {})
+    return stub
+
+
+class SheetExecutor:
+    def __init__(self, sheet_id: int) -> None:
+        self.sheet_id = sheet_id
+        self.calls = 0
+
+    async def execute(self, no_cache: bool = False) -> Any:
+        self.calls += 1
+        await asyncio.sleep(0)
+        return self.sheet_id
+
+
+@pytest.fixture
+def sheet_executors(monkeypatch: pytest.MonkeyPatch) -> dict[int, SheetExecutor]:
+    executors: dict[int, SheetExecutor] = {}
+
+    def get_executor(sheet_id: int) -> SheetExecutor:
+        return executors.setdefault(sheet_id, SheetExecutor(sheet_id))
+
+    monkeypatch.setattr(server, "_get_sheets_executor", get_executor)
+    monkeypatch.setattr(server, "_flatten_sheets", _flatten)
+    monkeypatch.setattr(
+        server, "flat_cache", server.FlatCache(ttl=server.FLAT_CACHE_TTL_SECONDS)
+    )
+    monkeypatch.setattr(server, "_inflight", {})
+    return executors
+
+
+def test_concurrent_misses_share_one_fetch(executor: StubExecutor) -> None:
+    async def run() -> list[str]:
+        results: list[str] = await asyncio.gather(
+            *(server.get_members() for _ in range(5))
+        )
+        return results
+
+    results = asyncio.run(run())
+
+    assert executor.calls == [False]
+    assert len(set(results)) == 1
+
+
+def test_no_cache_refetches_and_replaces_cached_data(executor: StubExecutor) -> None:
+    async def run() -> list[Any]:
+        first = orjson.loads(await server.get_members())
+        cached = orjson.loads(await server.get_members())
+        fresh = orjson.loads(await server.get_members(no_cache=True))
+        after = orjson.loads(await server.get_members())
+        return [first, cached, fresh, after]
+
+    first, cached, fresh, after = asyncio.run(run())
+
+    assert executor.calls == [False, True]
+    assert first[0]["fetch"] == cached[0]["fetch"] == 1
+    assert fresh[0]["fetch"] == after[0]["fetch"] == 2
+
+
+def test_miss_during_refresh_joins_it(executor: StubExecutor) -> None:
+    async def run() -> list[Any]:
+        results = await asyncio.gather(
+            server.get_members(no_cache=True), server.get_members()
+        )
+        return [orjson.loads(text) for text in [*results, await server.get_members()]]
+
+    fresh, joined, after = asyncio.run(run())
+
+    assert executor.calls == [True]
+    assert fresh[0]["fetch"] == joined[0]["fetch"] == after[0]["fetch"] == 1
+
+
+def test_older_fetch_does_not_overwrite_refresh(executor: StubExecutor) -> None:
+    # The plain miss starts first but finishes after the forced refresh
+    executor.delays[False] = 0.05
+
+    async def run() -> list[Any]:
+        miss = asyncio.create_task(server.get_members())
+        await asyncio.sleep(0)
+        results = await asyncio.gather(miss, server.get_members(no_cache=True))
+        return [orjson.loads(text) for text in [*results, await server.get_members()]]
+
+    stale, fresh, after = asyncio.run(run())
+
+    assert executor.calls == [False, True]
+    assert stale[0]["fetch"] == 1
+    assert fresh[0]["fetch"] == after[0]["fetch"] == 2
+
+
+def test_concurrent_sheets_get_their_own_data(
+    sheet_executors: dict[int, SheetExecutor],
+) -> None:
+    async def run() -> list[str]:
+        results: list[str] = await asyncio.gather(
+            server.get_sheets(1), server.get_sheets(2), server.get_sheets(1)
+        )
+        return results
+
+    results = [orjson.loads(text) for text in asyncio.run(run())]
+
+    assert [{row["fetch"] for row in rows} for rows in results] == [{1}, {2}, {1}]
+    assert sheet_executors[1].calls == sheet_executors[2].calls == 1
+
+
+def test_mask_cache_is_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(server, "QUERY_CACHE_SIZE", 2)
+    data = _flatten(1)
+
+    for query in ["age > 20", "age > 30", "age > 40"]:
+        server._filter(data, query)
+
+    assert list(data.masks) == ["age > 30", "age > 40"]
+
+
+def test_response_cache_is_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(server, "RESPONSE_CACHE_SIZE", 2)
+    data = _flatten(1)
+
+    async def run() -> None:
+        for query in ["age > 20", "age > 30", "age > 40"]:
+            await server._records_response(data, query, None)
+
+    asyncio.run(run())
+
+    assert list(data.responses) == [("age > 30", None), ("age > 40", None)]
+
+
+def test_invalid_query_returns_error_payload(executor: StubExecutor) -> None:
+    result = orjson.loads(asyncio.run(server.get_members(query="missing == 1")))
+
+    assert result["error"].startswith("Invalid query:")
+
+
+@pytest.mark.parametrize(
+    ("columns", "message"),
+    [
+        (["氏名", "missing"], "Unknown columns: ['missing']"),
+        ([], "columns must name at least one column"),
+    ],
+)
+def test_invalid_columns_return_error_payload(columns: list[str], message: str) -> None:
+    data = _flatten(1)
+
+    result = orjson.loads(asyncio.run(server._records_response(data, None, columns)))
+
+    assert result == {"error": message}
+    # Error payloads are rendered per call and never cached
+    assert not data.responses
+
+
+def test_repeated_columns_are_selected_once(executor: StubExecutor) -> None:
+    result = orjson.loads(
+        asyncio.run(server.get_members(columns=["氏名", "社員番号", "氏名"]))
+    )
+
+    assert result[0] == {"氏名": "田中", "社員番号": "A001"}
+
+
+def test_string_columns_query_and_serialize_missing_values(
+    executor: StubExecutor,
+) -> None:
+    with warnings.catch_warnings():
+        # pandas warns when it has to switch numexpr to the python engine
+        warnings.filterwarnings(
+            "error", message="Engine has switched", category=RuntimeWarning
+        )
+        result = orjson.loads(
+            asyncio.run(server.get_members(query="氏名.str.contains('田中') or age > 40"))
+        )
+
+    assert [row["氏名"] for row in result] == ["田中", None]
+
+
+@pytest.fixture
+def sheets_config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    path = tmp_path / "sheets_config.json"
+    monkeypatch.setattr(server, "SHEETS_CONFIG_PATH", path)
+    server._sheet_ids_json.cache_clear()
+    yield path
+    server._sheet_ids_json.cache_clear()
+
+
+def test_sheet_ids_load_error_is_not_cached(sheets_config: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        server._sheet_ids_json()
+
+    sheets_config.write_text('{"sheets": [{"id": 1, "name": "基本情報"}]}')
+
+    assert orjson.loads(server._sheet_ids_json()) == [{"id": 1, "name": "基本情報"}]
+
+
+def test_sheets_config_rejects_invalid_entries(sheets_config: Path) -> None:
+    sheets_config.write_text('{"sheets": [{"id": "x"}]}')
+
+    with pytest.raises(ValueError, match="sheets_config.json is invalid"):
+        server.load_sheets_config()
+
+
+@pytest.mark.parametrize("arguments", [{}, {"sheet_id": "first"}])
+def test_get_sheets_handler_rejects_bad_sheet_id(
+    sheet_executors: dict[int, SheetExecutor], arguments: dict[str, Any]
+) -> None:
+    with pytest.raises(ValidationError, match="sheet_id"):
+        asyncio.run(server._HANDLERS["get_sheets"](arguments))
+
+    assert not sheet_executors